@@ -8,9 +8,110 @@ import asyncio
 import json
 import sys
 import argparse
-import math
 import aiohttp
-from typing import Optional, List, Dict, Any
+from bisect import bisect_left
+from collections import Counter
+from itertools import accumulate
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 成员及其完整身份组快照
+RoleSnapshot = Tuple[discord.Member, List[discord.Role]]
+
+# 嫌疑人数不超过该值时改为逐个排查；默认值 2 与二分的最后一轮相同，
+# 可通过 linearThreshold 调大
+LINEAR_THRESHOLD = 2
+
+# 修改身份组后等待生效的时间（秒）
+SETTLE_DELAY = 1.0
+
+# 同时进行的身份组修改请求数，保持在服务器成员修改的限速范围内
+EDIT_CONCURRENCY = 8
+
+# 用于估计嫌疑人活跃度的最近消息条数，默认 0 表示不使用活跃度
+PRIOR_HISTORY_LIMIT = 0
+
+
+def json_dumps(data: Any) -> str:
+    """序列化为 JSON，有 orjson 时使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data)
+
+
+def json_loads(text: str) -> Any:
+    """解析 JSON，有 orjson 时使用 orjson"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def write_stdout(text: str):
+    """以 UTF-8 写入 stdout 并立即刷新，不受控制台编码影响"""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(text.encode("utf-8"))
+    sys.stdout.buffer.flush()
+
+
+class ProgressWriter:
+    """后台输出协程，合并输出行并在线程中写入 stdout，避免阻塞事件循环"""
+
+    # 合并输出的时间窗口（秒）
+    FLUSH_INTERVAL = 0.05
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """写完所有待输出的行后停止"""
+        if self.task:
+            self.queue.put_nowait(None)
+            await self.task
+        self.queue = None
+        self.task = None
+
+    def write(self, line: str):
+        if self.queue is None:
+            # 没有运行中的输出协程时直接输出
+            write_stdout(f"{line}\n")
+        else:
+            self.queue.put_nowait(line)
+
+    @staticmethod
+    def flush_lines(lines: List[str]):
+        write_stdout("".join(f"{line}\n" for line in lines))
+
+    async def run(self):
+        while True:
+            line = await self.queue.get()
+            if line is None:
+                return
+            await asyncio.sleep(self.FLUSH_INTERVAL)
+            lines = [line]
+            stopping = False
+            while not self.queue.empty():
+                line = self.queue.get_nowait()
+                if line is None:
+                    stopping = True
+                    break
+                # 同一批次中连续重复的行只输出一次
+                if line != lines[-1]:
+                    lines.append(line)
+            await asyncio.to_thread(self.flush_lines, lines)
+            if stopping:
+                return
+
+
+progress_writer = ProgressWriter()
 
 
 def output_progress(step: int, total: int, remaining: int, message: str, names: List[str] = None):
@@ -22,12 +123,45 @@ def output_progress(step: int, total: int, remaining: int, message: str, names:
         "message": message,
         "names": names or []
     }
-    print(f"PROGRESS:{json.dumps(data)}", flush=True)
+    progress_writer.write(f"PROGRESS:{json_dumps(data)}")
 
 
 def output_result(leaker: Dict[str, Any]):
     """输出结果"""
-    print(f"RESULT:{json.dumps(leaker)}", flush=True)
+    progress_writer.write(f"RESULT:{json_dumps(leaker)}")
+
+
+class RateLimited(Exception):
+    """Webhook 返回 429"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"被限速，{retry_after}秒后重试")
+        self.retry_after = retry_after
+
+
+def get_retry_after(e: Exception) -> Optional[float]:
+    """如果异常是 429 限速，返回需要等待的秒数，否则返回 None"""
+    if isinstance(e, RateLimited):
+        return e.retry_after
+    if isinstance(e, discord.HTTPException) and e.status == 429:
+        retry_after = getattr(e, "retry_after", None)
+        if retry_after is None and e.response is not None:
+            retry_after = e.response.headers.get("Retry-After")
+        return float(retry_after or 1.0)
+    return None
+
+
+async def with_retry(coro_factory: Callable[[], Awaitable[Any]], max_retries: int = 5) -> Any:
+    """执行请求，遇到 429 时按 Retry-After 等待后重试"""
+    for attempt in range(max_retries + 1):
+        try:
+            return await coro_factory()
+        except Exception as e:
+            retry_after = get_retry_after(e)
+            if retry_after is None or attempt == max_retries:
+                raise
+            output_progress(0, 0, 0, f"请求被限速，{retry_after:.1f}秒后重试...")
+            await asyncio.sleep(retry_after)
 
 
 class LeakerTracker:
@@ -38,11 +172,17 @@ class LeakerTracker:
         self.listener_token = config.get("listenerToken", "") or self.token  # 如果没有监听Token，使用发送Token
         self.server_id = int(config["serverId"])
         self.role_ids = [int(r) for r in config["roleIds"]]
+        self.role_id_set = frozenset(self.role_ids)
         self.target_channel_id = int(config["targetChannelId"])
         self.test_message = config["testMessage"]
         self.timeout = float(config.get("timeout", 10))
         self.webhook_url = config.get("webhookUrl", "")
         self.send_channel_id = int(config["sendChannelId"]) if config.get("sendChannelId") else None
+        # 以下调优参数只在直接运行 tracker.py --config 时生效，桌面端不会传入
+        self.linear_threshold = int(config.get("linearThreshold", LINEAR_THRESHOLD))
+        self.force_confirm = bool(config.get("forceConfirm", False))
+        self.edit_semaphore = asyncio.Semaphore(int(config.get("editConcurrency", EDIT_CONCURRENCY)))
+        self.prior_history_limit = int(config.get("priorHistoryLimit", PRIOR_HISTORY_LIMIT))
 
         # 代理设置
         proxy_url = None
@@ -57,119 +197,189 @@ class LeakerTracker:
         # 监听账号客户端（如果使用不同的Token）
         self.use_separate_listener = self.listener_token != self.token
         if self.use_separate_listener:
-            self.listener_client = discord.Client(proxy=proxy_url)
+            # 监听账号只需要目标频道的消息事件，不缓存成员和消息、不拉取成员列表
+            self.listener_client = discord.Client(
+                proxy=proxy_url,
+                chunk_guilds_at_startup=False,
+                member_cache_flags=discord.MemberCacheFlags.none(),
+                max_messages=None,
+            )
         else:
             self.listener_client = self.client
 
+        # Webhook 复用的 HTTP 会话，保持长连接
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        # Webhook 限速额度用完时，下次允许发送的时间（事件循环时间）
+        self.webhook_next_allowed = 0.0
+
         self.guild: Optional[discord.Guild] = None
         self.target_channel: Optional[discord.TextChannel] = None
         self.send_channel: Optional[discord.TextChannel] = None
         self.members_with_roles: List[discord.Member] = []
+        # 成员ID -> (完整身份组快照, 移除目标身份组后的身份组)
+        self.member_role_cache: Dict[int, Tuple[List[discord.Role], List[discord.Role]]] = {}
+        # 成员ID -> 显示名称
+        self.name_cache: Dict[int, str] = {}
+        # 成员ID -> 先验权重（最近发言数 + 1），为空时按人数对半分
+        self.member_weights: Dict[int, int] = {}
         self.found_leaker: Optional[discord.Member] = None
         self.message_detected = False
-        self.listener_ready = False
+        self.leak_event = asyncio.Event()
+        self.listener_ready_event = asyncio.Event()
 
     async def close_all_clients(self):
         """关闭所有客户端"""
-        try:
-            await self.close_all_clients()
-        except:
-            pass
-        if self.use_separate_listener:
+        if self.http_session:
             try:
-                await self.listener_client.close()
+                await self.http_session.close()
             except:
                 pass
+        # 并发关闭发送与监听客户端
+        await asyncio.gather(
+            self.client.close(),
+            self.listener_client.close() if self.use_separate_listener else asyncio.sleep(0),
+            return_exceptions=True
+        )
 
     async def get_members_with_roles(self) -> List[discord.Member]:
         """获取拥有指定身份组的所有成员"""
-        members = []
-        for member in self.guild.members:
-            for role in member.roles:
-                if role.id in self.role_ids:
-                    members.append(member)
-                    break
-        return members
-
-    async def remove_roles_from_members(self, members: List[discord.Member]) -> Dict[int, List[discord.Role]]:
-        """移除成员的身份组，返回原始身份组映射"""
+        # Role.members 直接查询成员的身份组ID列表，无需为每个成员构建 member.roles
+        role_objs = filter(None, (self.guild.get_role(rid) for rid in self.role_ids))
+        # dict 去重并保持顺序
+        return list(dict.fromkeys(m for role in role_objs for m in role.members))
+
+    def split_roles(self, member: discord.Member) -> Tuple[List[discord.Role], List[discord.Role]]:
+        """返回成员的完整身份组和移除目标身份组后的身份组（带缓存）"""
+        cached = self.member_role_cache.get(member.id)
+        if cached is None:
+            current_roles = [r for r in member.roles if not r.is_default()]
+            new_roles = [r for r in current_roles if r.id not in self.role_id_set]
+            cached = self.member_role_cache[member.id] = (current_roles, new_roles)
+        return cached
+
+    async def edit_roles(self, member: discord.Member, roles: List[discord.Role]):
+        """一次请求设置成员的完整身份组，限速时自动重试"""
+        async with self.edit_semaphore:
+            await with_retry(lambda: member.edit(roles=roles, reason="leak tracker"))
+
+    async def remove_roles_from_members(self, members: List[discord.Member]) -> Dict[int, RoleSnapshot]:
+        """移除成员的身份组，返回 成员ID -> (成员, 完整身份组快照) 映射"""
         original_roles = {}
+        targets = []
         for member in members:
-            roles_to_remove = [r for r in member.roles if r.id in self.role_ids]
-            if roles_to_remove:
-                original_roles[member.id] = roles_to_remove
-                for role in roles_to_remove:
-                    try:
-                        await member.remove_roles(role)
-                    except discord.Forbidden as e:
-                        output_progress(0, 0, 0, f"【错误】移除身份组失败: 权限不足 - {e}")
-                        raise Exception(f"权限不足，无法移除身份组: {e}")
-                    except Exception as e:
-                        output_progress(0, 0, 0, f"【错误】移除身份组失败: {e}")
-                        raise Exception(f"移除身份组失败: {e}")
+            current_roles, new_roles = self.split_roles(member)
+            if len(new_roles) != len(current_roles):
+                original_roles[member.id] = (member, current_roles)
+                targets.append((member, new_roles))
+
+        # 每个成员一次 PATCH 提交完整身份组列表，所有成员并发执行
+        results = await asyncio.gather(
+            *(self.edit_roles(member, roles) for member, roles in targets),
+            return_exceptions=True
+        )
+        if any(isinstance(result, Exception) for result in results):
+            # 部分成员可能已被移除，先恢复成功的部分再报错
+            await self.restore_roles({
+                member.id: original_roles[member.id]
+                for (member, _), result in zip(targets, results)
+                if not isinstance(result, Exception)
+            })
+        for result in results:
+            if isinstance(result, discord.Forbidden):
+                output_progress(0, 0, 0, f"【错误】移除身份组失败: 权限不足 - {result}")
+                raise Exception(f"权限不足，无法移除身份组: {result}")
+        for result in results:
+            if isinstance(result, Exception):
+                output_progress(0, 0, 0, f"【错误】移除身份组失败: {result}")
+                raise Exception(f"移除身份组失败: {result}")
         return original_roles
 
-    async def restore_roles(self, original_roles: Dict[int, List[discord.Role]]):
+    async def restore_roles(self, original_roles: Dict[int, RoleSnapshot]):
         """恢复成员的身份组"""
-        for member_id, roles in original_roles.items():
-            member = self.guild.get_member(member_id)
-            if member:
-                for role in roles:
-                    try:
-                        await member.add_roles(role)
-                    except Exception as e:
-                        output_progress(0, 0, 0, f"恢复身份组失败: {e}")
+        # 直接使用移除时保存的成员对象，不依赖成员缓存
+        targets = list(original_roles.values())
+        results = await asyncio.gather(
+            *(self.edit_roles(member, roles) for member, roles in targets),
+            return_exceptions=True
+        )
+        for (member, _), result in zip(targets, results):
+            if isinstance(result, Exception):
+                # 恢复失败时成员的实际身份组未知，下次重新读取
+                self.member_role_cache.pop(member.id, None)
+                output_progress(0, 0, 0, f"恢复身份组失败: {result}")
+
+    def is_leak_message(self, message: discord.Message) -> bool:
+        """判断消息是否为泄露的测试消息"""
+        test_message = self.test_message
+        # 先查正文，命中时无需再检查嵌入内容
+        if test_message in message.content:
+            return True
+        for embed in message.embeds:
+            if embed.description and test_message in embed.description:
+                return True
+            if embed.title and test_message in embed.title:
+                return True
+        return False
 
     async def wait_for_leak(self, timeout: float = 30.0) -> bool:
         """等待目标频道出现泄露消息"""
-        self.message_detected = False
-
-        def check_message(message: discord.Message) -> bool:
-            if message.channel.id != self.target_channel_id:
-                return False
-            content = message.content
-            if message.embeds:
-                for embed in message.embeds:
-                    if embed.description:
-                        content += embed.description
-                    if embed.title:
-                        content += embed.title
-            return self.test_message in content
-
         try:
-            # 使用监听客户端等待消息
-            await asyncio.wait_for(
-                self.listener_client.wait_for('message', check=check_message),
-                timeout=timeout
-            )
+            # 由监听客户端的 on_message 设置事件
+            async with asyncio.timeout(timeout):
+                await self.leak_event.wait()
             self.message_detected = True
             return True
         except asyncio.TimeoutError:
             return False
 
-    async def send_test_message(self):
-        """发送测试消息（通过webhook或账号）"""
+    async def send_test_message(self, not_before: float = 0.0):
+        """发送测试消息（通过webhook或账号）
+
+        not_before 为最早发送时间（事件循环时间），身份组生效等待与 Webhook 限速等待合并进行。
+        """
+        loop = asyncio.get_running_loop()
+
+        async def wait_until(send_at: float):
+            delay = send_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # 每次实际发送前清除事件，避免漏掉发送后立即出现的泄露消息
+            self.message_detected = False
+            self.leak_event.clear()
+
         try:
             if self.webhook_url:
                 # 使用webhook发送
                 output_progress(0, 0, 0, f"使用Webhook发送消息...")
-                async with aiohttp.ClientSession() as session:
-                    payload = {"content": self.test_message}
+                payload = {"content": self.test_message}
+
+                async def post_webhook():
+                    # 额度已用完时等到重置后再发，避免触发 429
+                    await wait_until(max(not_before, self.webhook_next_allowed))
                     async with asyncio.timeout(30):  # 30秒超时
-                        async with session.post(self.webhook_url, json=payload) as resp:
+                        async with self.http_session.post(self.webhook_url, json=payload) as resp:
+                            if resp.headers.get("X-RateLimit-Remaining") == "0":
+                                reset_after = float(resp.headers.get("X-RateLimit-Reset-After", 0))
+                                self.webhook_next_allowed = loop.time() + reset_after
+                            if resp.status == 429:
+                                raise RateLimited(float(resp.headers.get("Retry-After", 1.0)))
                             if resp.status != 204 and resp.status != 200:
                                 text = await resp.text()
                                 output_progress(0, 0, 0, f"Webhook发送失败: HTTP {resp.status} - {text}")
                                 raise Exception(f"Webhook发送失败: HTTP {resp.status}")
-                            output_progress(0, 0, 0, "Webhook发送成功")
+
+                await with_retry(post_webhook)
+                output_progress(0, 0, 0, "Webhook发送成功")
             else:
                 # 使用账号发送
                 if self.send_channel:
                     output_progress(0, 0, 0, f"使用账号发送消息到频道: {self.send_channel.name}")
-                    await asyncio.wait_for(
-                        self.send_channel.send(self.test_message),
-                        timeout=30  # 30秒超时
-                    )
+                    async def send_message():
+                        await wait_until(not_before)
+                        async with asyncio.timeout(30):  # 30秒超时
+                            await self.send_channel.send(self.test_message)
+
+                    await with_retry(send_message)
                     output_progress(0, 0, 0, "消息发送成功")
                 else:
                     raise Exception("没有可用的发送频道")
@@ -186,94 +396,241 @@ class LeakerTracker:
             output_progress(0, 0, 0, f"【错误】发送消息失败: {type(e).__name__}: {e}")
             raise
 
-    async def binary_search(self, suspects: List[discord.Member],
-                           step: int = 1) -> Optional[discord.Member]:
-        """二分搜索找出泄露者"""
-        total_steps = math.ceil(math.log2(len(suspects))) + 1 if suspects else 0
-        suspect_names = [m.display_name for m in suspects]
-
-        output_progress(step, total_steps, len(suspects),
-                       f"当前嫌疑人数: {len(suspects)}", suspect_names)
-
-        if len(suspects) == 0:
-            return None
-
-        if len(suspects) == 1:
-            output_progress(step, total_steps, 1,
-                           f"锁定最终嫌疑人: {suspects[0].display_name}", [suspects[0].display_name])
-            return suspects[0]
-
-        mid = len(suspects) // 2
-        first_half = suspects[:mid]
-        second_half = suspects[mid:]
-        first_names = [m.display_name for m in first_half]
-        second_names = [m.display_name for m in second_half]
-
-        output_progress(step, total_steps, len(suspects),
-                       f"移除前半部分 {len(first_half)} 人的身份组: {', '.join(first_names)}", suspect_names)
-
-        removed_roles = await self.remove_roles_from_members(first_half)
+    async def load_member_weights(self):
+        """统计发送频道最近的发言数作为嫌疑人的先验权重，并按权重从高到低排序"""
+        # 只使用明确配置的发送频道，不用回退的第一个文字频道
+        if not self.prior_history_limit or not self.send_channel_id or not self.send_channel:
+            return
+        counts = Counter()
+        try:
+            async for message in self.send_channel.history(limit=self.prior_history_limit):
+                counts[message.author.id] += 1
+        except discord.HTTPException as e:
+            output_progress(0, 0, 0, f"读取频道历史失败，按人数二分: {e}")
+            return
+        self.member_weights = {m.id: counts[m.id] + 1 for m in self.members_with_roles}
+        self.members_with_roles.sort(key=lambda m: self.member_weights[m.id], reverse=True)
+
+    def split_point(self, suspects: List[discord.Member]) -> int:
+        """返回切分位置，使前半部分的先验权重约占一半；没有权重时取中点"""
+        if not self.member_weights:
+            return len(suspects) // 2
+        cumsum = list(accumulate(self.member_weights.get(m.id, 1) for m in suspects))
+        mid = bisect_left(cumsum, cumsum[-1] / 2) + 1
+        return min(max(mid, 1), len(suspects) - 1)
+
+    def max_rounds(self, suspects: List[discord.Member]) -> int:
+        """按实际的切分方式和逐个排查阈值，计算最坏情况下需要的轮数"""
+        worst = 0
+        stack = [(suspects, 0)]
+        while stack:
+            group, depth = stack.pop()
+            if len(group) <= 1:
+                worst = max(worst, depth)
+            elif len(group) <= self.linear_threshold:
+                # 逐个排查最多 len - 1 轮
+                worst = max(worst, depth + len(group) - 1)
+            else:
+                mid = self.split_point(group)
+                stack.append((group[:mid], depth + 1))
+                stack.append((group[mid:], depth + 1))
+        return worst
+
+    async def toggle_roles(self, targets: List[discord.Member], suspects: List[discord.Member],
+                           stripped: Dict[int, RoleSnapshot]):
+        """让嫌疑人中只有 targets 处于移除身份组的状态
+
+        只修改状态发生变化的成员；已排除的成员保持现状，搜索结束后统一恢复，
+        整个搜索的身份组修改次数为 O(N) 而不是 O(N log N)。
+        """
+        target_ids = {m.id for m in targets}
+        to_strip = [m for m in targets if m.id not in stripped]
+        to_restore = {
+            m.id: stripped.pop(m.id)
+            for m in suspects
+            if m.id in stripped and m.id not in target_ids
+        }
+        # 两组成员互不重叠，上一轮的恢复与本轮的移除同时进行
+        _, removed = await asyncio.gather(
+            self.restore_roles(to_restore),
+            self.remove_roles_from_members(to_strip),
+            return_exceptions=True
+        )
+        if isinstance(removed, BaseException):
+            raise removed
+        stripped.update(removed)
+
+    @staticmethod
+    def only_stripped(member: discord.Member, stripped: Dict[int, RoleSnapshot]) -> bool:
+        """当前是否只有该成员处于移除身份组的状态"""
+        return len(stripped) == 1 and member.id in stripped
+
+    async def probe(self, removed: List[discord.Member], suspects: List[discord.Member],
+                    stripped: Dict[int, RoleSnapshot], step: int, total_steps: int,
+                    suspect_names: List[str]) -> bool:
+        """移除指定成员的身份组并发送测试消息，返回是否仍然泄露"""
+        await self.toggle_roles(removed, suspects, stripped)
+        if not any(m.id in stripped for m in removed):
+            # 这些成员已经没有目标身份组，不可能是泄露者，跳过本轮等待
+            output_progress(step, total_steps, len(suspect_names),
+                           "【跳过】这部分成员没有可移除的身份组，直接排除", suspect_names)
+            return True
         leaked = False
 
         try:
-            await asyncio.sleep(1)
+            # 身份组生效的等待计入发送前的准备时间
+            settle_until = asyncio.get_running_loop().time() + SETTLE_DELAY
 
-            output_progress(step, total_steps, len(suspects),
+            output_progress(step, total_steps, len(suspect_names),
                            "发送测试消息...", suspect_names)
-            await self.send_test_message()
+            await self.send_test_message(not_before=settle_until)
 
-            output_progress(step, total_steps, len(suspects),
+            output_progress(step, total_steps, len(suspect_names),
                            f"等待泄露消息 ({self.timeout}秒)...", suspect_names)
             leaked = await self.wait_for_leak(timeout=self.timeout)
 
             # 详细显示监听结果
             if leaked:
-                output_progress(step, total_steps, len(suspects),
+                output_progress(step, total_steps, len(suspect_names),
                                "【监听到泄露消息】", suspect_names)
             else:
-                output_progress(step, total_steps, len(suspects),
+                output_progress(step, total_steps, len(suspect_names),
                                "【未监听到泄露消息】", suspect_names)
         except Exception as e:
-            output_progress(step, total_steps, len(suspects),
+            output_progress(step, total_steps, len(suspect_names),
                            f"【错误】搜索过程出错: {e}", suspect_names)
             raise
+
+        return leaked
+
+    async def linear_probe(self, suspects: List[discord.Member], suspect_names: List[str],
+                           stripped: Dict[int, RoleSnapshot],
+                           step: int, total_steps: int) -> Tuple[Optional[discord.Member], bool]:
+        """嫌疑人很少时逐个排查，省去继续二分的轮次"""
+        for i, (suspect, name) in enumerate(zip(suspects[:-1], suspect_names)):
+            output_progress(step, total_steps, len(suspects),
+                           f"逐个排查，移除 {name} 的身份组", suspect_names)
+            if not await self.probe([suspect], suspects[i:], stripped,
+                                    step, total_steps, suspect_names):
+                output_progress(step, total_steps, 1,
+                               f"锁定最终嫌疑人: {name}", [name])
+                return suspect, self.only_stripped(suspect, stripped)
+            step += 1
+
+        # 其余人都已排除，剩下的即为泄露者
+        output_progress(step, total_steps, 1,
+                       f"锁定最终嫌疑人: {suspect_names[-1]}", [suspect_names[-1]])
+        return suspects[-1], False
+
+    async def binary_search(self, suspects: List[discord.Member],
+                           step: int = 1) -> Tuple[Optional[discord.Member], bool]:
+        """二分搜索找出泄露者
+
+        返回 (嫌疑人, 是否已验证)。已验证表示最后一轮所有其他成员的身份组都已恢复、
+        只移除了该嫌疑人，且未监听到泄露，等同于最终确认。
+        """
+        if not suspects:
+            output_progress(step, 0, 0, "当前嫌疑人数: 0", [])
+            return None, False
+
+        if self.member_weights or self.linear_threshold > 2:
+            # 按权重切分或逐个排查时轮数可能超过 log2(n)，按最坏情况计算
+            total_steps = self.max_rounds(suspects) + 1
+        else:
+            # 等价于 ceil(log2(n)) + 1，不经过浮点运算
+            total_steps = (len(suspects) - 1).bit_length() + 1
+        verified = False
+        # 名字列表与嫌疑人列表一起切分，避免每轮重新读取 display_name
+        suspect_names = [self.name_cache.get(m.id) or m.display_name for m in suspects]
+        # 当前处于移除身份组状态的成员ID -> 原始身份组
+        stripped: Dict[int, RoleSnapshot] = {}
+
+        try:
+            while True:
+                output_progress(step, total_steps, len(suspects),
+                               f"当前嫌疑人数: {len(suspects)}", suspect_names)
+
+                if len(suspects) == 1:
+                    output_progress(step, total_steps, 1,
+                                   f"锁定最终嫌疑人: {suspect_names[0]}", suspect_names)
+                    return suspects[0], verified
+
+                if len(suspects) <= self.linear_threshold:
+                    return await self.linear_probe(suspects, suspect_names, stripped,
+                                                   step, total_steps)
+
+                mid = self.split_point(suspects)
+                first_half = suspects[:mid]
+                second_half = suspects[mid:]
+                first_names = suspect_names[:mid]
+                second_names = suspect_names[mid:]
+
+                output_progress(step, total_steps, len(suspects),
+                               f"移除前半部分 {len(first_half)} 人的身份组: {', '.join(first_names)}", suspect_names)
+
+                leaked = await self.probe(first_half, suspects, stripped,
+                                          step, total_steps, suspect_names)
+
+                if leaked:
+                    output_progress(step, total_steps, len(second_half),
+                                   f"泄露者在后半部分 ({len(second_half)} 人): {', '.join(second_names)}", second_names)
+                    suspects, suspect_names = second_half, second_names
+                    verified = False
+                else:
+                    output_progress(step, total_steps, len(first_half),
+                                   f"泄露者在前半部分 ({len(first_half)} 人): {', '.join(first_names)}", first_names)
+                    suspects, suspect_names = first_half, first_names
+                    # 只有本轮仅移除了最终嫌疑人时，未泄露的结果才能代替最终确认
+                    verified = len(first_half) == 1 and self.only_stripped(first_half[0], stripped)
+                step += 1
         finally:
             # 无论如何都要恢复身份组
             output_progress(step, total_steps, len(suspects),
                            "恢复身份组...", suspect_names)
-            await self.restore_roles(removed_roles)
-
-        if leaked:
-            output_progress(step, total_steps, len(second_half),
-                           f"泄露者在后半部分 ({len(second_half)} 人): {', '.join(second_names)}", second_names)
-            return await self.binary_search(second_half, step + 1)
-        else:
-            output_progress(step, total_steps, len(first_half),
-                           f"泄露者在前半部分 ({len(first_half)} 人): {', '.join(first_names)}", first_names)
-            return await self.binary_search(first_half, step + 1)
+            await self.restore_roles(stripped)
 
     async def run(self):
         """运行追踪器"""
+        progress_writer.start()
+        try:
+            await self.start_clients()
+        finally:
+            # 监听账号登录超时等提前返回的情况也要关闭会话
+            if self.http_session and not self.http_session.closed:
+                await self.http_session.close()
+            await progress_writer.stop()
+
+    async def start_clients(self):
+        """启动客户端并在登录后开始搜索"""
+        if self.webhook_url:
+            self.http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300, keepalive_timeout=60)
+            )
+
+        @self.listener_client.event
+        async def on_message(message: discord.Message):
+            if message.channel.id != self.target_channel_id:
+                return
+            if self.is_leak_message(message):
+                self.leak_event.set()
+
         # 如果使用单独的监听账号，先启动监听客户端
         if self.use_separate_listener:
             @self.listener_client.event
             async def on_ready():
                 output_progress(0, 0, 0, f"监听账号已登录: {self.listener_client.user}")
-                self.listener_ready = True
+                self.listener_ready_event.set()
 
             # 在后台启动监听客户端
             asyncio.create_task(self.listener_client.start(self.listener_token))
             output_progress(0, 0, 0, "正在启动监听账号...")
             # 等待监听客户端就绪
-            for _ in range(30):  # 最多等待30秒
-                if self.listener_ready:
-                    break
-                await asyncio.sleep(1)
-            if not self.listener_ready:
+            try:
+                async with asyncio.timeout(30):  # 最多等待30秒
+                    await self.listener_ready_event.wait()
+            except asyncio.TimeoutError:
                 output_progress(0, 0, 0, "错误: 监听账号登录超时")
                 return
-        else:
-            self.listener_ready = True
 
         @self.client.event
         async def on_ready():
@@ -287,7 +644,19 @@ class LeakerTracker:
 
             output_progress(0, 0, 0, f"服务器: {self.guild.name}")
 
+            # 只在开始前拉取一次完整成员列表，搜索过程中只使用快照
+            if not self.guild.chunked:
+                output_progress(0, 0, 0, "正在获取成员列表...")
+                try:
+                    await self.guild.chunk(cache=True)
+                except Exception as e:
+                    output_progress(0, 0, 0, f"获取成员列表失败，使用已缓存的成员: {e}")
+
             self.members_with_roles = await self.get_members_with_roles()
+            self.member_role_cache.clear()
+            for member in self.members_with_roles:
+                self.split_roles(member)
+            self.name_cache = {m.id: m.display_name for m in self.members_with_roles}
             output_progress(0, 0, len(self.members_with_roles),
                            f"找到 {len(self.members_with_roles)} 个会员")
 
@@ -314,57 +683,56 @@ class LeakerTracker:
             output_progress(0, 0, len(self.members_with_roles),
                            "开始二分搜索...")
 
-            leaker = await self.binary_search(
+            await self.load_member_weights()
+
+            leaker, verified = await self.binary_search(
                 self.members_with_roles
             )
 
             if leaker:
                 self.found_leaker = leaker
-                leaker_roles = [r.name for r in leaker.roles if r.name != "@everyone"]
-                avatar_url = str(leaker.avatar.url) if leaker.avatar else ""
+                leaker_name = leaker.display_name
+                # 确认前先固定结果，避免确认期间成员信息变化；身份组取自移除前的快照
+                leaker_snapshot = {
+                    "id": str(leaker.id),
+                    "username": leaker.name,
+                    "display_name": leaker_name,
+                    "avatar": str(leaker.avatar.url) if leaker.avatar else "",
+                    "roles": [r.name for r in self.split_roles(leaker)[0]],
+                }
 
-                # 最终确认：移除嫌疑人身份组，再次验证
-                output_progress(0, 0, 1, f"【最终确认】移除 {leaker.display_name} 的身份组...", [leaker.display_name])
-                removed_roles = await self.remove_roles_from_members([leaker])
                 still_leaked = False
+                if verified and not self.force_confirm:
+                    # 二分最后一轮已单独移除此人且未泄露，无需重复确认
+                    output_progress(0, 0, 1, f"【最终确认】最后一轮已单独验证 {leaker_name}，跳过重复确认", [leaker_name])
+                else:
+                    # 最终确认：移除嫌疑人身份组，再次验证
+                    output_progress(0, 0, 1, f"【最终确认】移除 {leaker_name} 的身份组...", [leaker_name])
+                    removed_roles = await self.remove_roles_from_members([leaker])
 
-                try:
-                    await asyncio.sleep(1)
+                    try:
+                        settle_until = asyncio.get_running_loop().time() + SETTLE_DELAY
 
-                    output_progress(0, 0, 1, "【最终确认】发送测试消息...", [leaker.display_name])
-                    await self.send_test_message()
+                        output_progress(0, 0, 1, "【最终确认】发送测试消息...", [leaker_name])
+                        await self.send_test_message(not_before=settle_until)
 
-                    output_progress(0, 0, 1, f"【最终确认】等待泄露消息 ({self.timeout}秒)...", [leaker.display_name])
-                    still_leaked = await self.wait_for_leak(timeout=self.timeout)
-                except Exception as e:
-                    output_progress(0, 0, 1, f"【错误】最终确认过程出错: {e}", [leaker.display_name])
-                finally:
-                    # 无论如何都要恢复身份组
-                    output_progress(0, 0, 1, "【最终确认】恢复身份组...", [leaker.display_name])
-                    await self.restore_roles(removed_roles)
+                        output_progress(0, 0, 1, f"【最终确认】等待泄露消息 ({self.timeout}秒)...", [leaker_name])
+                        still_leaked = await self.wait_for_leak(timeout=self.timeout)
+                    except Exception as e:
+                        output_progress(0, 0, 1, f"【错误】最终确认过程出错: {e}", [leaker_name])
+                    finally:
+                        # 无论如何都要恢复身份组
+                        output_progress(0, 0, 1, "【最终确认】恢复身份组...", [leaker_name])
+                        await self.restore_roles(removed_roles)
 
                 if still_leaked:
                     # 移除后仍然泄露，说明冤枉了
-                    output_progress(0, 0, 0, f"【确认失败】移除 {leaker.display_name} 后仍监听到泄露，可能冤枉了此人！", [leaker.display_name])
-                    output_result({
-                        "id": str(leaker.id),
-                        "username": leaker.name,
-                        "display_name": leaker.display_name,
-                        "avatar": avatar_url,
-                        "roles": leaker_roles,
-                        "confirmed": False
-                    })
+                    output_progress(0, 0, 0, f"【确认失败】移除 {leaker_name} 后仍监听到泄露，可能冤枉了此人！", [leaker_name])
+                    output_result({**leaker_snapshot, "confirmed": False})
                 else:
                     # 移除后没有泄露，确认是泄露者
-                    output_progress(0, 0, 0, f"【确认成功】移除 {leaker.display_name} 后未监听到泄露，确认是泄露者！", [leaker.display_name])
-                    output_result({
-                        "id": str(leaker.id),
-                        "username": leaker.name,
-                        "display_name": leaker.display_name,
-                        "avatar": avatar_url,
-                        "roles": leaker_roles,
-                        "confirmed": True
-                    })
+                    output_progress(0, 0, 0, f"【确认成功】移除 {leaker_name} 后未监听到泄露，确认是泄露者！", [leaker_name])
+                    output_result({**leaker_snapshot, "confirmed": True})
             else:
                 output_progress(0, 0, 0, "未找到泄露者")
 
@@ -414,6 +782,13 @@ async def test_connection(token: str, proxy: str = None):
 
 
 def main():
+    # 有 uvloop 时使用（Windows 不支持，回退到默认事件循环）
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", required=False)
     parser.add_argument("--test-connection", dest="test_token", required=False)
@@ -424,7 +799,7 @@ def main():
         # 测试连接模式
         asyncio.run(test_connection(args.test_token, args.proxy))
     elif args.config:
-        config = json.loads(args.config)
+        config = json_loads(args.config)
         tracker = LeakerTracker(config)
         asyncio.run(tracker.run())
     else: